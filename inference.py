@@ -37,6 +37,23 @@ def aggressive_cleanup():
         torch.cuda.synchronize()
 
 
+def is_memory_low(min_free_fraction=0.1):
+    """Check whether free VRAM has dropped below the given fraction of total"""
+    if not torch.cuda.is_available():
+        return False
+    free, total = torch.cuda.mem_get_info()
+    return free < total * min_free_fraction
+
+
+def load_checkpoint(path):
+    """Load a torch checkpoint memory-mapped, skipping the transient full in-memory copy of the file"""
+    # Legacy (non-zipfile) checkpoints and older PyTorch versions can't be mmapped
+    try:
+        return torch.load(path, map_location="cpu", weights_only=False, mmap=True)
+    except (RuntimeError, TypeError):
+        return torch.load(path, map_location="cpu", weights_only=False)
+
+
 class ComfyUIFluxWrapper(nn.Module):
     def __init__(self, comfyui_model):
         super().__init__()
@@ -345,7 +362,7 @@ def load_lucidflux_model(args,ckpt_path,cf_model,torch_device,offload=False):
     if '.safetensors' in args.checkpoint:
         checkpoint = load_safetensors(args.checkpoint)
     else:
-        checkpoint = torch.load(args.checkpoint,weights_only=False, map_location='cpu')
+        checkpoint = load_checkpoint(args.checkpoint)
 
     condition_lq.load_state_dict(checkpoint["condition_lq"], strict=False)
     if not offload:
@@ -398,7 +415,7 @@ def preprocess_data(state_dict,swinir_path,siglip_model,input_pli_list, inp_cond
         unshuffle=True,
         unshuffle_scale=8,
     )
-    ckpt_obj = torch.load(swinir_path, weights_only=False,map_location="cpu")
+    ckpt_obj = load_checkpoint(swinir_path)
     state = ckpt_obj.get("state_dict", ckpt_obj)
     new_state = {k.replace("module.", ""): v for k, v in state.items()}
     swinir.load_state_dict(new_state, strict=False)
@@ -504,11 +521,12 @@ def get_cond_from_embeddings(prompt_embeddings, height, width, device, bs=1):
 
     txt_ids = torch.zeros(bs, txt.shape[1], 3)
 
+    # txt/vec are pinned when they come from the embedding cache, so copy them async
     inp_cond = {
         "img_ids": img_ids.to(device),
-        "txt": txt.to(device),
+        "txt": txt.to(device, non_blocking=True),
         "txt_ids": txt_ids.to(device),
-        "vec": vec.to(device),
+        "vec": vec.to(device, non_blocking=True),
     }
     return inp_cond
 
@@ -533,7 +551,7 @@ def preprocess_data_cached(swinir_cache, redux_cache, state_dict, swinir_path, s
             unshuffle=True,
             unshuffle_scale=8,
         )
-        ckpt_obj = torch.load(swinir_path, weights_only=False, map_location="cpu")
+        ckpt_obj = load_checkpoint(swinir_path)
         state = ckpt_obj.get("state_dict", ckpt_obj)
         new_state = {k.replace("module.", ""): v for k, v in state.items()}
         swinir.load_state_dict(new_state, strict=False)
@@ -567,7 +585,12 @@ def preprocess_data_cached(swinir_cache, redux_cache, state_dict, swinir_path, s
 
             del ci_01
 
-        ci_pre_origin = ci_pre.clone()
+        # Only the final color fix needs the SwinIR output again, so with offload
+        # enabled park it in host memory instead of holding VRAM during sampling
+        if offload:
+            ci_pre_origin = ci_pre.cpu()
+        else:
+            ci_pre_origin = ci_pre
         condition_cond_ldr = (ci_pre * 2.0 - 1.0).to(dtype)
 
         swinir_results.append({
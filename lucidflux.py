@@ -1,6 +1,7 @@
 import numpy as np
 import torch
 import os
+from collections import OrderedDict
 from omegaconf import OmegaConf
 import folder_paths
 import gc
@@ -20,10 +21,28 @@ get_cond_from_embeddings = inference.get_cond_from_embeddings
 preprocess_data_cached = inference.preprocess_data_cached
 print_memory_status = inference.print_memory_status
 aggressive_cleanup = inference.aggressive_cleanup
+is_memory_low = inference.is_memory_low
+load_checkpoint = inference.load_checkpoint
 wavelet_reconstruction = align_color.wavelet_reconstruction
 
 MAX_SEED = np.iinfo(np.int32).max
 
+# Only these mean torch.compile itself failed, anything else is a real error in the color fix
+try:
+    from torch._dynamo.exc import TorchDynamoException
+    COMPILE_ERRORS = (TorchDynamoException,)
+except ImportError:
+    COMPILE_ERRORS = ()
+try:
+    # Newer inductor reports its failures (e.g. a missing Triton) outside the dynamo hierarchy
+    from torch._inductor.exc import InductorError
+    COMPILE_ERRORS += (InductorError,)
+except ImportError:
+    pass
+
+# SwinIR needs dimensions divisible by this, must stay a power of two for _snap_dimensions
+SWINIR_MULTIPLE = 64
+
 device = torch.device(
     "cuda:0") if torch.cuda.is_available() else torch.device(
     "mps") if torch.backends.mps.is_available() else torch.device(
@@ -35,21 +54,67 @@ if not os.path.exists(weigths_LucidFlux_current_path):
 folder_paths.add_model_folder_path("LucidFlux", weigths_LucidFlux_current_path)
 
 
+def _has_triton():
+    # Inductor needs Triton for CUDA kernels, which the usual Windows install does not ship
+    try:
+        from torch.utils._triton import has_triton
+    except ImportError:
+        return False
+    return has_triton()
+
+
+def _snap_dimensions(width, height):
+    # Round down to a multiple of SWINIR_MULTIPLE (at least one multiple) by masking off the low bits
+    mask = ~(SWINIR_MULTIPLE - 1)
+    adjusted_width = max(width, SWINIR_MULTIPLE) & mask
+    adjusted_height = max(height, SWINIR_MULTIPLE) & mask
+
+    if adjusted_width != width or adjusted_height != height:
+        print(f"WARNING: SwinIR dimension adjustment: {width}x{height} → {adjusted_width}x{adjusted_height}")
+        print(f"   (Dimensions must be divisible by {SWINIR_MULTIPLE})")
+
+    return adjusted_width, adjusted_height
+
+
+def _pin_tensors(obj):
+    if torch.is_tensor(obj):
+        return obj.pin_memory()
+    if isinstance(obj, dict):
+        return {k: _pin_tensors(v) for k, v in obj.items()}
+    # Exact types only, namedtuples and other subclasses cannot be rebuilt from an iterable
+    if type(obj) in (list, tuple):
+        return type(obj)(_pin_tensors(v) for v in obj)
+    return obj
+
+
+def color_fix(decoded_images, ci_pre_origin):
+    # (B, H, W, 3) VAE output in, color corrected (B, H, W, 3) IMAGE out
+    x1 = decoded_images.clamp(-1, 1).permute(0, 3, 1, 2)
+    hq = wavelet_reconstruction((x1 + 1.0) / 2, ci_pre_origin)
+    return hq.clamp(0, 1).permute(0, 2, 3, 1)
+
+
 class PiePie_Lucidflux:
 
-    _model_cache = {}
+    _model_cache = OrderedDict()
+    _MAX_CACHED_MODELS = 2
     _swinir_cache = {}
     _redux_cache = {}
+    _prompt_emb_cache = OrderedDict()
+    _MAX_CACHED_PROMPT_EMBEDDINGS = 1
+    _COLOR_FIX_BATCH = 4
+    _color_fix = None
 
     @classmethod
     def INPUT_TYPES(cls):
+        lucidflux_files, swinir_files, prompt_files = cls._list_available_assets()
         return {
             "required": {
                 "flux_model": ("MODEL",),
-                "LucidFlux": (["none"] + [i for i in folder_paths.get_filename_list("LucidFlux") if "lucid" in i.lower()],),
+                "LucidFlux": (["none"] + lucidflux_files,),
                 "image": ("IMAGE",),
                 "vae": ("VAE",),
-                "swinir": (["none"] + [i for i in folder_paths.get_filename_list("LucidFlux") if "swinir" in i.lower()],),
+                "swinir": (["none"] + swinir_files,),
                 "width": ("INT", {
                     "default": 1024,
                     "min": 64,
@@ -81,7 +146,7 @@ class PiePie_Lucidflux:
                     "round": 0.01
                 }),
                 "use_embeddings": ("BOOLEAN", {"default": True}),
-                "prompt_embeddings": (["none"] + [i for i in folder_paths.get_filename_list("LucidFlux") if "prompt" in i.lower() or i.endswith(".pt")],),
+                "prompt_embeddings": (["none"] + prompt_files,),
                 "enable_offload": ("BOOLEAN", {"default": False}),
             },
             "optional": {
@@ -89,12 +154,28 @@ class PiePie_Lucidflux:
             }
         }
 
+    @staticmethod
+    def _list_available_assets():
+        # folder_paths caches the listing and invalidates it on folder mtime changes,
+        # so fetch it once and sort every file into its dropdown in a single pass
+        lucidflux_files, swinir_files, prompt_files = [], [], []
+        for name in folder_paths.get_filename_list("LucidFlux"):
+            lower_name = name.lower()
+            if "lucid" in lower_name:
+                lucidflux_files.append(name)
+            if "swinir" in lower_name:
+                swinir_files.append(name)
+            if "prompt" in lower_name or name.endswith(".pt"):
+                prompt_files.append(name)
+        return lucidflux_files, swinir_files, prompt_files
+
     RETURN_TYPES = ("IMAGE",)
     RETURN_NAMES = ("image",)
     FUNCTION = "process"
     CATEGORY = "PiePie"
     DESCRIPTION = "Combined LucidFlux node - loads model and processes images with optional prompt embeddings"
 
+    @torch.inference_mode()
     def process(self, flux_model, LucidFlux, image, vae, swinir, width, height, CLIP_VISION,
                 steps, seed, cfg, use_embeddings=True, prompt_embeddings="none", enable_offload=False,
                 positive=None):
@@ -120,29 +201,13 @@ class PiePie_Lucidflux:
         model_type = "flux-dev" if is_dev else "flux-schnell"
         print(f"Detected model type: {model_type}")
 
-        cache_key = f"{LucidFlux_path}_{id(flux_model)}_{model_type}"
-
-        if cache_key in self._model_cache:
-            print("Using cached LucidFlux model")
-            model, state = self._model_cache[cache_key]
-        else:
-            origin_dict = {
-                "name": model_type,
-                "offload": enable_offload,
-                "device": "cuda:0",
-                "output_dir": folder_paths.get_output_directory(),
-                "checkpoint": LucidFlux_path,
-            }
-            args = OmegaConf.create(origin_dict)
-            model, state = load_lucidflux_model(args, None, flux_model, device, enable_offload)
-            self._model_cache[cache_key] = (model, state)
+        model, state = self._load_or_get_cached_model(LucidFlux_path, flux_model, model_type, enable_offload)
 
         prompt_emb_data = None
         if use_embeddings and prompt_embeddings != "none":
             prompt_emb_path = folder_paths.get_full_path("LucidFlux", prompt_embeddings)
             if prompt_emb_path is not None:
-                print(f"Loading prompt embeddings from {prompt_emb_path}")
-                prompt_emb_data = torch.load(prompt_emb_path, map_location='cpu', weights_only=False)
+                prompt_emb_data = self._load_prompt_embeddings(prompt_emb_path)
 
         print("Starting LucidFlux processing...")
 
@@ -151,18 +216,7 @@ class PiePie_Lucidflux:
         if swinir_path is None:
             raise ValueError("SwinIR checkpoint is required")
 
-        SWINIR_MULTIPLE = 64
-        adjusted_width = (width // SWINIR_MULTIPLE) * SWINIR_MULTIPLE
-        adjusted_height = (height // SWINIR_MULTIPLE) * SWINIR_MULTIPLE
-
-        if adjusted_width < SWINIR_MULTIPLE:
-            adjusted_width = SWINIR_MULTIPLE
-        if adjusted_height < SWINIR_MULTIPLE:
-            adjusted_height = SWINIR_MULTIPLE
-
-        if adjusted_width != width or adjusted_height != height:
-            print(f"WARNING: SwinIR dimension adjustment: {width}x{height} → {adjusted_width}x{adjusted_height}")
-            print(f"   (Dimensions must be divisible by {SWINIR_MULTIPLE})")
+        adjusted_width, adjusted_height = _snap_dimensions(width, height)
 
         input_pli_list = tensor2pillist_upscale(image, adjusted_width, adjusted_height)
 
@@ -187,6 +241,17 @@ class PiePie_Lucidflux:
             enable_offload
         )
 
+        # Sampling never reads ci_pre_origin, only the final color fix does, so pull it out
+        # of the per-image dicts into a single batch that is ready for wavelet_reconstruction
+        ci_pre_origin = [j.pop("ci_pre_origin") for j in condition]
+        if enable_offload and torch.cuda.is_available():
+            # Concatenate straight into one pinned buffer so the batch is copied only once
+            batch_shape = (sum(t.shape[0] for t in ci_pre_origin),) + tuple(ci_pre_origin[0].shape[1:])
+            pinned = torch.empty(batch_shape, dtype=ci_pre_origin[0].dtype, pin_memory=True)
+            ci_pre_origin = torch.cat(ci_pre_origin, dim=0, out=pinned)
+        else:
+            ci_pre_origin = torch.cat(ci_pre_origin, dim=0)
+
         # Sampling
         print("Generating restoration...")
 
@@ -207,30 +272,110 @@ class PiePie_Lucidflux:
         # Decoding
         print("Decoding latents...")
 
-        images = []
-        for idx, (i, j) in enumerate(zip(x, condition)):
-
-            decoded_image = vae.decode(i).squeeze(0)
+        # Every latent shares the adjusted resolution, so decode them as one batch.
+        # ComfyUI's VAE.decode already splits the batch by free VRAM internally.
+        latents = torch.cat(x, dim=0)
+        decoded_images = vae.decode(latents)
+        del x, latents, condition
 
-            x1 = decoded_image.clamp(-1, 1).to(device)
-            hq = wavelet_reconstruction((x1.permute(2, 0, 1) + 1.0) / 2, j.get("ci_pre_origin").squeeze(0).to(device))
-            hq = hq.clamp(0, 1)
-            hq = hq.unsqueeze(0).permute(0, 2, 3, 1)
+        # Color fix a few images at a time so the wavelet intermediates stay bounded on long batches
+        images = []
+        for decoded_chunk, origin_chunk in zip(decoded_images.split(self._COLOR_FIX_BATCH),
+                                               ci_pre_origin.split(self._COLOR_FIX_BATCH)):
+            decoded_chunk = decoded_chunk.to(device)
+            origin_chunk = origin_chunk.to(device, non_blocking=True)
+            try:
+                hq = self._get_color_fix()(decoded_chunk, origin_chunk)
+            except COMPILE_ERRORS as e:
+                print(f"Compiling the color fix failed, falling back to eager mode: {e}")
+                PiePie_Lucidflux._color_fix = color_fix
+                hq = color_fix(decoded_chunk, origin_chunk)
             images.append(hq)
-
-            del decoded_image, x1, i
-            if idx % 1 == 0:
-                aggressive_cleanup()
+            del decoded_chunk, origin_chunk
 
         img = torch.cat(images, dim=0)
 
-        del x, images, condition
-        aggressive_cleanup()
+        del decoded_images, ci_pre_origin, images
+        # Let the caching allocator keep its blocks unless VRAM is actually tight
+        if is_memory_low():
+            aggressive_cleanup()
 
         print("LucidFlux processing complete")
 
         return (img,)
 
+    @classmethod
+    def _load_or_get_cached_model(cls, LucidFlux_path, flux_model, model_type, enable_offload):
+        # Key on the diffusion model the wrapper holds on to rather than the patcher:
+        # the cached entry keeps it alive, so its id() cannot be reused while cached
+        diffusion_model = getattr(getattr(flux_model, "model", None), "diffusion_model", flux_model)
+        ckpt_stat = os.stat(LucidFlux_path)
+        cache_key = (f"{LucidFlux_path}_{ckpt_stat.st_size}_{ckpt_stat.st_mtime_ns}_"
+                     f"{type(diffusion_model).__name__}_{id(diffusion_model)}_{model_type}")
+
+        if cache_key in cls._model_cache:
+            print("Using cached LucidFlux model")
+            cls._model_cache.move_to_end(cache_key)
+            return cls._model_cache[cache_key]
+
+        # Evict the least recently used models before loading another one
+        while len(cls._model_cache) >= cls._MAX_CACHED_MODELS:
+            _, (old_model, old_state) = cls._model_cache.popitem(last=False)
+            print("Evicting least recently used LucidFlux model from cache")
+            # The flux model itself belongs to ComfyUI, only move our own branches off the GPU
+            old_model["dual_condition_branch"].to("cpu")
+            # The Redux encoder is cached by id() of the connector state dict, drop it
+            # too so a later state dict cannot pick up a stale encoder
+            cls._redux_cache.pop(str(id(old_state)), None)
+            del old_model, old_state
+            aggressive_cleanup()
+
+        origin_dict = {
+            "name": model_type,
+            "offload": enable_offload,
+            "device": "cuda:0",
+            "output_dir": folder_paths.get_output_directory(),
+            "checkpoint": LucidFlux_path,
+        }
+        args = OmegaConf.create(origin_dict)
+        model, state = load_lucidflux_model(args, None, flux_model, device, enable_offload)
+        cls._model_cache[cache_key] = (model, state)
+        return model, state
+
+    @classmethod
+    def _load_prompt_embeddings(cls, prompt_emb_path):
+        # Keep the embeddings pinned between runs so moving them to the GPU can be async
+        mtime = os.path.getmtime(prompt_emb_path)
+        cached = cls._prompt_emb_cache.get(prompt_emb_path)
+        if cached is not None and cached[0] == mtime:
+            print("Using cached prompt embeddings")
+            cls._prompt_emb_cache.move_to_end(prompt_emb_path)
+            return cached[1]
+
+        # Pinned pages stay locked while cached, so only keep the most recent files
+        cls._prompt_emb_cache.pop(prompt_emb_path, None)
+        while len(cls._prompt_emb_cache) >= cls._MAX_CACHED_PROMPT_EMBEDDINGS:
+            cls._prompt_emb_cache.popitem(last=False)
+
+        print(f"Loading prompt embeddings from {prompt_emb_path}")
+        prompt_emb_data = load_checkpoint(prompt_emb_path)
+        if torch.cuda.is_available():
+            prompt_emb_data = _pin_tensors(prompt_emb_data)
+        cls._prompt_emb_cache[prompt_emb_path] = (mtime, prompt_emb_data)
+        return prompt_emb_data
+
+    @classmethod
+    def _get_color_fix(cls):
+        # The color fix is pure tensor code, so compiling it lets inductor fuse the
+        # pointwise ops around the blur convolutions. dynamic=True avoids a recompile
+        # for every new resolution or batch size.
+        if cls._color_fix is None:
+            if device.type == "cuda" and hasattr(torch, "compile") and _has_triton():
+                cls._color_fix = torch.compile(color_fix, dynamic=True)
+            else:
+                cls._color_fix = color_fix
+        return cls._color_fix
+
 
 NODE_CLASS_MAPPINGS = {
     "PiePie_Lucidflux": PiePie_Lucidflux,
@@ -1,6 +1,7 @@
 import os
 import json
-import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+import torch
 from PIL import Image
 from PIL.PngImagePlugin import PngInfo
 import folder_paths
@@ -10,6 +11,9 @@ class PiePiePreviewImage:
         self.output_dir = folder_paths.get_output_directory()
         self.type = "output"
         self.compress_level = 4
+        # List inputs run this node once per item with the same prompt, so remember its JSON
+        self._last_prompt = None
+        self._last_prompt_json = None
 
     @classmethod
     def INPUT_TYPES(s):
@@ -34,6 +38,7 @@ class PiePiePreviewImage:
 
     def preview_and_save(self, images, save_mode, filename_prefix="", prompt=None, extra_pnginfo=None):        
         results = []
+        save_jobs = []
         
         # Handle empty filename_prefix - use empty string which Comfy treats as no prefix
         # This should match CORE Save Image node behavior but come on guys, put a prefix there
@@ -44,24 +49,20 @@ class PiePiePreviewImage:
         full_output_folder, filename, counter, subfolder, filename_prefix = \
             folder_paths.get_save_image_path(filename_prefix, self.output_dir, images[0].shape[1], images[0].shape[0])
 
-        for batch_number, image in enumerate(images):
-            i = 255. * image.cpu().numpy()
-            img = Image.fromarray(np.clip(i, 0, 255).astype(np.uint8))
-            
-            # We take the metadata passed from COMFY
-            metadata = PngInfo()
-            if prompt is not None:
-                metadata.add_text("prompt", json.dumps(prompt))
-            if extra_pnginfo is not None:
-                for x in extra_pnginfo:
-                    metadata.add_text(x, json.dumps(extra_pnginfo[x]))
+        # We take the metadata passed from COMFY, it is the same for every image in the batch
+        metadata = self._build_metadata(prompt, extra_pnginfo)
+
+        images_uint8 = self._to_uint8(images)
 
+        for batch_number, image in enumerate(images_uint8):
+            img = Image.fromarray(image)
+            
             file = f"{filename}_{counter:05d}_.png"
             filepath = os.path.join(full_output_folder, file)
             
             if save_mode == "Always save":
                 # Save to established output folder
-                img.save(filepath, pnginfo=metadata, compress_level=self.compress_level)
+                save_jobs.append((img, filepath, metadata, self.compress_level))
                 results.append({
                     "filename": file,
                     "subfolder": subfolder,
@@ -74,7 +75,7 @@ class PiePiePreviewImage:
                 temp_dir = folder_paths.get_temp_directory()
                 temp_file = f"{filename}_{counter:05d}_.png"
                 temp_path = os.path.join(temp_dir, temp_file)
-                img.save(temp_path, pnginfo=metadata, compress_level=self.compress_level)
+                save_jobs.append((img, temp_path, metadata, self.compress_level))
                 
                 results.append({
                     "filename": temp_file,
@@ -84,8 +85,43 @@ class PiePiePreviewImage:
             
             counter += 1
 
+        # PNG compression releases the GIL, so encode the batch in parallel
+        with ThreadPoolExecutor(max_workers=min(8, len(save_jobs))) as executor:
+            list(executor.map(self._save_png, save_jobs))
+
         return {"ui": {"images": results}}
+
+    def _build_metadata(self, prompt, extra_pnginfo):
+        metadata = PngInfo()
+        if prompt is not None:
+            # Holding on to the last prompt keeps its id from being reused by a new dict
+            if prompt is not self._last_prompt:
+                self._last_prompt = prompt
+                self._last_prompt_json = json.dumps(prompt)
+            metadata.add_text("prompt", self._last_prompt_json)
+        if extra_pnginfo is not None:
+            for x in extra_pnginfo:
+                metadata.add_text(x, json.dumps(extra_pnginfo[x]))
+        return metadata
+
+    @staticmethod
+    def _save_png(job):
+        img, path, metadata, compress_level = job
+        img.save(path, pnginfo=metadata, compress_level=compress_level)
     
+    def _to_uint8(self, images, chunk_size=8):
+        # Quantise a few images at a time on their own device so no whole-batch float copy
+        # is made and only uint8 bytes go over to the host
+        on_cuda = images.is_cuda
+        host_buffer = torch.empty(images.shape, dtype=torch.uint8, pin_memory=on_cuda)
+        for start in range(0, images.shape[0], chunk_size):
+            chunk = images[start:start + chunk_size]
+            quantized = chunk.clamp(0, 1).mul_(255).round_().to(torch.uint8)
+            host_buffer[start:start + chunk.shape[0]].copy_(quantized, non_blocking=on_cuda)
+        if on_cuda:
+            torch.cuda.current_stream(images.device).synchronize()
+        return host_buffer.numpy()
+
     @classmethod
     def IS_CHANGED(s, **kwargs):
         return float("nan")
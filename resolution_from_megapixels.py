@@ -1,4 +1,30 @@
-from .resolutions_db import RESOLUTIONS
+import functools
+import numpy as np
+from .resolutions_db import FLAT_TABLE, MODEL_TYPES, ORIENTATIONS
+
+
+# Only a handful of type/orientation combinations exist, so each table is built once
+@functools.lru_cache(maxsize=None)
+def _filtered_resolutions(model_type, orientation):
+    """Return the unique (width, height) rows matching the filters, in JSON order"""
+    mask = np.ones(len(FLAT_TABLE), dtype=bool)
+    
+    if model_type != "ALL":
+        if model_type not in MODEL_TYPES:
+            return FLAT_TABLE[:0, :2]
+        mask &= FLAT_TABLE[:, 2] == MODEL_TYPES.index(model_type)
+    
+    if orientation != "ALL":
+        if orientation not in ORIENTATIONS:
+            return FLAT_TABLE[:0, :2]
+        mask &= FLAT_TABLE[:, 3] == ORIENTATIONS.index(orientation)
+    
+    dims = FLAT_TABLE[mask, :2]
+    _, first_seen = np.unique(dims, axis=0, return_index=True)
+    dims = dims[np.sort(first_seen)]
+    dims.flags.writeable = False
+    return dims
+
 
 class PiePieResolutionFromMegapixels:
 
@@ -34,54 +60,32 @@ class PiePieResolutionFromMegapixels:
         
         resolutions = self._get_filtered_resolutions(type, orientation)
         
-        if not resolutions:
+        if len(resolutions) == 0:
             print(f"[PiePie Resolution from MP] ERROR: No resolutions found for type={type}, orientation={orientation}")
             return (1024, 1024, 1.048576)
         
-        res_with_mp = [(w, h, self._calculate_megapixels(w, h)) for w, h in resolutions]
+        dims = resolutions.astype(np.int64)
+        megapixels = dims[:, 0] * dims[:, 1] / 1_000_000
+        distance = np.abs(megapixels - target_megapixels)
         
         if exceed_limit:
-            valid_resolutions = [(w, h, mp) for w, h, mp in res_with_mp if mp <= target_megapixels]
+            valid = megapixels <= target_megapixels
             
-            if not valid_resolutions:
-                width, height, actual_mp = min(res_with_mp, key=lambda x: x[2])
+            if not valid.any():
+                idx = int(np.argmin(megapixels))
+                width, height, actual_mp = int(dims[idx, 0]), int(dims[idx, 1]), float(megapixels[idx])
                 print(f"[PiePie Resolution from MP] No resolutions ≤ {target_megapixels:.2f}MP found with current filters (type={type}, orientation={orientation}). Using smallest available: {width}x{height} ({actual_mp:.2f}MP)")
                 return (width, height, actual_mp)
             
-            width, height, actual_mp = min(valid_resolutions, key=lambda x: abs(x[2] - target_megapixels))
-        else:
-            width, height, actual_mp = min(res_with_mp, key=lambda x: abs(x[2] - target_megapixels))
-        
-        return (width, height, actual_mp)
-    
-    def _get_filtered_resolutions(self, model_type, orientation):
-
-        results = []
-        
-        model_types = RESOLUTIONS.keys() if model_type == "ALL" else [model_type]
-        
-        for mtype in model_types:
-            if mtype not in RESOLUTIONS:
-                continue
-            
-            orientations = RESOLUTIONS[mtype].keys() if orientation == "ALL" else [orientation]
-            
-            for orient in orientations:
-                if orient in RESOLUTIONS[mtype]:
-                    results.extend(RESOLUTIONS[mtype][orient])
+            distance = np.where(valid, distance, np.inf)
         
-        seen = set()
-        unique_results = []
-        for res in results:
-            if res not in seen:
-                seen.add(res)
-                unique_results.append(res)
+        # argmin keeps the first match on ties, same as min() over the list did
+        idx = int(np.argmin(distance))
         
-        return unique_results
+        return (int(dims[idx, 0]), int(dims[idx, 1]), float(megapixels[idx]))
     
-    def _calculate_megapixels(self, width, height):
-        return (width * height) / 1_000_000
-
+    def _get_filtered_resolutions(self, model_type, orientation):
+        return _filtered_resolutions(model_type, orientation)
 
 NODE_CLASS_MAPPINGS = {
     "PiePieResolutionFromMegapixels": PiePieResolutionFromMegapixels
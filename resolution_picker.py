@@ -1,35 +1,44 @@
+import functools
 from .resolutions_db import RESOLUTIONS
 
+
+# Only a handful of type/orientation combinations exist, so each list is built once
+@functools.lru_cache(maxsize=None)
+def _resolutions_for_type_and_orientation(model_type, orientation):
+    if model_type == "CUSTOM":
+        return ("Use Custom Width/Height",)
+    elif model_type == "ALL":
+        if orientation == "ALL":
+            all_res = set()
+            for mtype in RESOLUTIONS:
+                for orient in RESOLUTIONS[mtype]:
+                    for width, height in RESOLUTIONS[mtype][orient]:
+                        all_res.add(f"{width}x{height}")
+            return tuple(sorted(all_res, key=lambda x: int(x.split('x')[0])))
+        else:
+            all_res = set()
+            for mtype in RESOLUTIONS:
+                if orientation in RESOLUTIONS[mtype]:
+                    for width, height in RESOLUTIONS[mtype][orientation]:
+                        all_res.add(f"{width}x{height}")
+            return tuple(sorted(all_res, key=lambda x: int(x.split('x')[0])))
+    else:
+        if orientation == "ALL":
+            all_res = []
+            for orient in RESOLUTIONS[model_type]:
+                for width, height in RESOLUTIONS[model_type][orient]:
+                    all_res.append(f"{width}x{height}")
+            return tuple(all_res)
+        else:
+            return tuple(f"{w}x{h}" for w, h in RESOLUTIONS[model_type][orientation])
+
+
 class PiePieResolutionPicker:
    
     @classmethod
     def get_resolutions_for_type_and_orientation(cls, model_type, orientation):
-        if model_type == "CUSTOM":
-            return ["Use Custom Width/Height"]
-        elif model_type == "ALL":
-            if orientation == "ALL":
-                all_res = set()
-                for mtype in RESOLUTIONS:
-                    for orient in RESOLUTIONS[mtype]:
-                        for width, height in RESOLUTIONS[mtype][orient]:
-                            all_res.add(f"{width}x{height}")
-                return sorted(list(all_res), key=lambda x: int(x.split('x')[0]))
-            else:
-                all_res = set()
-                for mtype in RESOLUTIONS:
-                    if orientation in RESOLUTIONS[mtype]:
-                        for width, height in RESOLUTIONS[mtype][orientation]:
-                            all_res.add(f"{width}x{height}")
-                return sorted(list(all_res), key=lambda x: int(x.split('x')[0]))
-        else:
-            if orientation == "ALL":
-                all_res = []
-                for orient in RESOLUTIONS[model_type]:
-                    for width, height in RESOLUTIONS[model_type][orient]:
-                        all_res.append(f"{width}x{height}")
-                return all_res
-            else:
-                return [f"{w}x{h}" for w, h in RESOLUTIONS[model_type][orientation]]
+        # Comfy expects combo options as a list, hand out a copy of the cached tuple
+        return list(_resolutions_for_type_and_orientation(model_type, orientation))
     
     @classmethod
     def INPUT_TYPES(s):
@@ -1,5 +1,6 @@
 import json
 import os
+import numpy as np
 
 # Load resolutions from JSON file
 _current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -14,4 +15,19 @@ for model_type, orientations in _resolutions_data.items():
     for orientation, resolutions in orientations.items():
         RESOLUTIONS[model_type][orientation] = [
             (width, height) for width, height in resolutions
-        ]
\ No newline at end of file
+        ]
+
+# Flat view of RESOLUTIONS for numpy consumers, one row per entry in JSON order:
+# (width, height, index into MODEL_TYPES, index into ORIENTATIONS)
+MODEL_TYPES = tuple(RESOLUTIONS)
+ORIENTATIONS = tuple(dict.fromkeys(
+    orientation for orientations in RESOLUTIONS.values() for orientation in orientations
+))
+
+FLAT_TABLE = np.array([
+    (width, height, model_idx, ORIENTATIONS.index(orientation))
+    for model_idx, model_type in enumerate(MODEL_TYPES)
+    for orientation, resolutions in RESOLUTIONS[model_type].items()
+    for width, height in resolutions
+], dtype=np.int32).reshape(-1, 4)
+FLAT_TABLE.flags.writeable = False
@@ -74,7 +74,7 @@ def wavelet_blur(image: Tensor, radius: int):
     """
     Apply wavelet blur to the input tensor.
     """
-    # input shape: (1, 3, H, W)
+    # input shape: (B, 3, H, W), the grouped conv blurs every image in the batch
     # convolution kernel
     kernel_vals = [
         [0.0625, 0.125, 0.0625],
@@ -108,6 +108,8 @@ def wavelet_decomposition(image: Tensor, levels=5):
 def wavelet_reconstruction(content_feat:Tensor, style_feat:Tensor):
     """
     Apply wavelet decomposition, so that the content will have the same color as the style.
+    Both inputs are (B, 3, H, W) batches; each content image takes its colors from the
+    style image at the same batch index.
     """
     # calculate the wavelet decomposition of the content feature
     content_high_freq, content_low_freq = wavelet_decomposition(content_feat)
@@ -1,25 +1,61 @@
+# Dropdown options, Comfy only treats list inputs as combos so these stay lists
+_DELIM_CHOICES = ["Space", "Comma + Space", "Comma", "Custom"]
+_YESNO = ["No", "Yes"]
+# Default shown in the Custom Delimiter widget and used when none is passed
+_DEFAULT_CUSTOM_DELIMITER = " | "
+
+# Preset delimiters with the newline variants already applied, keyed by
+# (delimiter, newline_after_each) so no delimiter string is built per call
+_DELIM_TABLE = {
+    ("Space", "No"): " ",
+    ("Space", "Yes"): " \n",
+    ("Comma + Space", "No"): ", ",
+    ("Comma + Space", "Yes"): ", \n",
+    ("Comma", "No"): ",",
+    ("Comma", "Yes"): ",\n",
+}
+
+
+def _wrap(result):
+    # "string" feeds the preview widget in js/text_concatenate.js, "result" the STRING output
+    return {"ui": {"string": [result]}, "result": (result,)}
+
+
+# Returned when every input is blank, Comfy only reads node outputs so one shared value is enough
+_EMPTY_RETURN = _wrap("")
+
+
+def _resolve_delimiter(delimiter, newline_after_each, custom_delimiter):
+    delim = _DELIM_TABLE.get((delimiter, newline_after_each))
+    if delim is not None:
+        return delim
+    # Custom - an empty custom delimiter is allowed and joins the texts directly
+    delim = custom_delimiter if custom_delimiter is not None else _DEFAULT_CUSTOM_DELIMITER
+    if newline_after_each == "Yes":
+        delim = delim + "\n"
+    return delim
+
+
 class PiePieTextConcatenate:  
+    # The inputs never change, so build the dict once instead of on every UI refresh
+    _INPUT_TYPES = {
+        "required": {
+            "delimiter": (_DELIM_CHOICES, {"default": "Comma + Space"}),
+            "newline_after_each": (_YESNO, {"default": "No"}),
+            "custom_delimiter": ("STRING", {"default": _DEFAULT_CUSTOM_DELIMITER}),
+        },
+        "optional": {
+            "text1": ("STRING", {"default": "", "multiline": True}),
+            "text2": ("STRING", {"default": "", "multiline": True}),
+            "text3": ("STRING", {"default": "", "multiline": True}),
+            "text4": ("STRING", {"default": "", "multiline": True}),
+            "text5": ("STRING", {"default": "", "multiline": True}),
+        },
+    }
+
     @classmethod
     def INPUT_TYPES(s):
-        return {
-            "required": {
-                "delimiter": ([
-                    "Space", 
-                    "Comma + Space", 
-                    "Comma",
-                    "Custom"
-                ], {"default": "Comma + Space"}),
-                "newline_after_each": (["No", "Yes"], {"default": "No"}),
-                "custom_delimiter": ("STRING", {"default": " | "}),
-            },
-            "optional": {
-                "text1": ("STRING", {"default": "", "multiline": True}),
-                "text2": ("STRING", {"default": "", "multiline": True}),
-                "text3": ("STRING", {"default": "", "multiline": True}),
-                "text4": ("STRING", {"default": "", "multiline": True}),
-                "text5": ("STRING", {"default": "", "multiline": True}),
-            },
-        }
+        return s._INPUT_TYPES
 
     RETURN_TYPES = ("STRING",)
     RETURN_NAMES = ("text",)
@@ -27,35 +63,28 @@ class PiePieTextConcatenate:
     OUTPUT_NODE = True  # This allows it to execute without being connected
     CATEGORY = "PiePieDesign"
 
-    def concatenate_text(self, delimiter, newline_after_each, custom_delimiter,
-                        text1="", text2="", text3="", text4="", text5=""):
+    @staticmethod
+    def concatenate_text(delimiter, newline_after_each, custom_delimiter,
+                         text1="", text2="", text3="", text4="", text5=""):
                         
-        texts = []
-        for text in [text1, text2, text3, text4, text5]:
-            if text and text.strip():
-                texts.append(text)
+        # isspace() stops at the first non-whitespace character and, unlike strip(),
+        # does not build a new string just to test it
+        texts = [text for text in (text1, text2, text3, text4, text5) if text and not text.isspace()]
         
         # If nothing was provided, return empty string
         if not texts:
-            result = ""
+            return _EMPTY_RETURN
+        
+        if len(texts) == 1:
+            # Nothing to separate, skip the delimiter and the join copy
+            result = texts[0]
         else:
-
-            if delimiter == "Space":
-                delim = " "
-            elif delimiter == "Comma + Space":
-                delim = ", "
-            elif delimiter == "Comma":
-                delim = ","
-            else:  # Custom
-                delim = custom_delimiter if custom_delimiter is not None else " | "
-            
-            if newline_after_each == "Yes":
-                delim = delim + "\n"
+            delim = _resolve_delimiter(delimiter, newline_after_each, custom_delimiter)
             
             # Join all the texts together
             result = delim.join(texts)
         
-        return {"ui": {"string": [result]}, "result": (result,)}
+        return _wrap(result)
 
 
 NODE_CLASS_MAPPINGS = {